@@ -2,20 +2,29 @@ from __future__ import annotations
 
 import json
 import datetime as dt
+import functools
 from typing import List
 from .models import Config, ShiftConfig, RulesConfig, TimeRange
 
+# orjson is optional: faster parsing when installed, stdlib json otherwise
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 
 def parse_config(path: str) -> Config:
-    with open(path, "r", encoding="utf-8") as f:
-        raw = json.load(f)
+    with open(path, "rb") as f:
+        raw = _loads(f.read())
 
     shifts: List[ShiftConfig] = []
     for s in raw.get("shifts", []):
         # Backward-compat: infer min staff from prefer_two_or_more_in_shift if present
         prefer_two = bool(s.get("prefer_two_or_more_in_shift", False))
         inferred_min = 2 if prefer_two else 1
-        people_list = list(s["people"]) if isinstance(s.get("people"), list) else []
+        people_raw = s.get("people")
+        people_list = list(people_raw) if isinstance(people_raw, list) else []
         people_count = len(people_list)
         shifts.append(ShiftConfig(
             name=s["name"],
@@ -96,7 +105,10 @@ def validate_config(cfg: Config) -> None:
         raise ValueError("target_weekly_hours_min cannot exceed target_weekly_hours_max")
 
 
+@functools.lru_cache(maxsize=256)
 def _validate_time(t: str) -> None:
+    # Configs reuse a handful of HH:MM values; only parse each one once.
+    # Failures raise and are therefore never cached.
     try:
         dt.datetime.strptime(t, "%H:%M")
     except ValueError:
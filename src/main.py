@@ -1,12 +1,17 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
 import datetime as dt
+import io
+import math
+import os
 import sys
-from typing import Dict, List
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
 
 from .config import parse_config
-from .models import WeekPlan
+from .models import RulesConfig, ShiftConfig, WeekPlan
 from .scheduling import find_smallest_valid_pattern, write_csv, write_pivot_csv, write_pivot_xlsx, allocate_week_pattern, _pattern_meets_mins
 
 
@@ -21,6 +26,20 @@ def parse_args(argv=None) -> argparse.Namespace:
     return ap.parse_args(argv)
 
 
+def _search_captured(shift: ShiftConfig, rules: RulesConfig, max_weeks: int) -> Tuple[Optional[List[WeekPlan]], str, Optional[BaseException]]:
+    # Worker entry point: keep the search's messages with its result so the
+    # parent can print them in config order instead of as workers finish.
+    # A failure is returned rather than raised, so the messages printed
+    # before it are not lost with it.
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        try:
+            patterns = find_smallest_valid_pattern(shift, rules, max_weeks)
+        except Exception as exc:
+            return None, out.getvalue(), exc
+    return patterns, out.getvalue(), None
+
+
 def main(argv=None) -> int:
     args = parse_args(argv)
     cfg = parse_config(args.config)
@@ -42,25 +61,37 @@ def main(argv=None) -> int:
     global_weekend_counts: Dict[str, int] = {}
     
     # If require_equal_hours is enabled, we need to coordinate across all shifts
-    if hasattr(cfg.rules, 'require_equal_hours') and cfg.rules.require_equal_hours:
-        # Initialize global tracking with all people from all shifts
-        for s in cfg.shifts:
-            for p in s.people:
-                global_pattern_hours[p] = 0.0
-                global_weekend_counts[p] = 0
-        
+    if cfg.rules.require_equal_hours:
+        # Global tracking covers all people from all shifts
+        all_people = list(dict.fromkeys(p for s in cfg.shifts for p in s.people))
+
         # Find the maximum pattern length needed across all shifts
         max_pattern_weeks = args.max_weeks
+        # A person's hours are final once the last shift listing them has been
+        # allocated. If those people already differ by more than 0.5h/week the
+        # trial cannot pass, so the remaining shifts need not be allocated.
+        # When no one is in two shifts, allocations don't affect each other, so
+        # run the largest (most constrained) shifts first to fail a trial sooner.
+        # Shared people keep config order, which their hours depend on. The
+        # allocator's WARNING lines come out in this order, not config order.
+        ordered_shifts = list(cfg.shifts)
+        if sum(len(set(s.people)) for s in cfg.shifts) == len(all_people):
+            ordered_shifts.sort(key=lambda s: (-len(s.people), -s.max_day_staff))
+        last_shift_index = {p: i for i, s in enumerate(ordered_shifts) for p in s.people}
+        finalized_after = [
+            [p for p in dict.fromkeys(s.people) if last_shift_index[p] == i]
+            for i, s in enumerate(ordered_shifts)
+        ]
         for trial_weeks in range(2, max_pattern_weeks + 1):
             shift_patterns = {}
             pattern_lengths = []
-            # Reset global tracking for this trial
-            for p in global_pattern_hours:
-                global_pattern_hours[p] = 0.0
-                global_weekend_counts[p] = 0
+            # Fresh global tracking for this trial
+            global_pattern_hours = dict.fromkeys(all_people, 0.0)
+            global_weekend_counts = dict.fromkeys(all_people, 0)
             
             success = True
-            for s in cfg.shifts:
+            settled: List[float] = []
+            for i, s in enumerate(ordered_shifts):
                 try:
                     patterns = allocate_week_pattern(s, cfg.rules, trial_weeks, global_pattern_hours, global_weekend_counts)
                     if not _pattern_meets_mins(patterns, s):
@@ -71,15 +102,25 @@ def main(argv=None) -> int:
                 except ValueError:
                     success = False
                     break
+                # The last trial always runs in full: its patterns are written
+                # out when no trial reaches equal hours.
+                if i + 1 < len(ordered_shifts) and trial_weeks < max_pattern_weeks:
+                    settled.extend(global_pattern_hours[p] / trial_weeks for p in finalized_after[i])
+                    if settled and max(settled) - min(settled) > 0.5:
+                        # Only part of the roster is known here, so say so rather
+                        # than report the subset's spread as the trial's
+                        print(f"Pattern {trial_weeks} weeks: hours already unequal among the {len(settled)} people "
+                              f"allocated so far (min={min(settled):.1f}, max={max(settled):.1f}), "
+                              f"stopping early and trying longer...")
+                        success = False
+                        break
             
             if success:
                 # Check if all people have equal hours across ALL shifts
                 if global_pattern_hours:
-                    hours_values = list(global_pattern_hours.values())
-                    # Calculate average hours per week
-                    avg_hours = {p: h / trial_weeks for p, h in global_pattern_hours.items()}
-                    min_avg = min(avg_hours.values())
-                    max_avg = max(avg_hours.values())
+                    # Average hours per week; dividing after min/max gives the same values
+                    min_avg = min(global_pattern_hours.values()) / trial_weeks
+                    max_avg = max(global_pattern_hours.values()) / trial_weeks
                     
                     if max_avg - min_avg <= 0.5:
                         # Success! All people have equal hours
@@ -91,40 +132,53 @@ def main(argv=None) -> int:
                         print(f"Pattern {trial_weeks} weeks: hours not equal (min={min_avg:.1f}, max={max_avg:.1f}), trying longer...")
         else:
             print("Warning: Could not find pattern with equal hours across all shifts within max weeks")
+            # The last trial's patterns are used as-is; a shift that failed has none
+            missing = [s.name for s in cfg.shifts if s.name not in shift_patterns]
+            if missing:
+                print(f"Error: No valid pattern found for shift(s): {', '.join(missing)}", file=sys.stderr)
+                return 1
     else:
-        # Original behavior: each shift independently
+        # Original behavior: each shift independently. The searches don't
+        # share state, so run them in parallel when there is more than one.
+        solved: Dict[str, Tuple[Optional[List[WeekPlan]], str, Optional[BaseException]]] = {}
+        if len(cfg.shifts) > 1:
+            workers = min(len(cfg.shifts), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                futures = {ex.submit(_search_captured, s, cfg.rules, args.max_weeks): s.name for s in cfg.shifts}
+                for fut in as_completed(futures):
+                    solved[futures[fut]] = fut.result()
+        else:
+            for s in cfg.shifts:
+                solved[s.name] = (find_smallest_valid_pattern(s, cfg.rules, max_try_weeks=args.max_weeks), "", None)
+        # Report in config order regardless of completion order: each search's
+        # own messages first, then its summary, as a serial run prints them.
+        # A failed search raises once the shifts before it have been reported.
         for s in cfg.shifts:
-            patterns = find_smallest_valid_pattern(s, cfg.rules, max_try_weeks=args.max_weeks)
+            patterns, search_output, error = solved[s.name]
+            sys.stdout.write(search_output)
+            if error is not None:
+                raise error
             shift_patterns[s.name] = patterns
             pattern_lengths.append(len(patterns))
             print(f"Shift '{s.name}': repeating every {len(patterns)} weeks with {len(s.people)} members")
 
     # Determine total weeks: default to LCM of pattern lengths so full schedule repeats
-    import math
-    def lcm(a: int, b: int) -> int:
-        return abs(a*b) // math.gcd(a, b) if a and b else 0
-
     if args.weeks is None:
         if not pattern_lengths:
             print("Error: No shifts configured", file=sys.stderr)
             return 1
-        total_weeks = pattern_lengths[0]
-        for pl in pattern_lengths[1:]:
-            total_weeks = lcm(total_weeks, pl)
+        total_weeks = math.lcm(*pattern_lengths)
         print(f"Total weeks not provided; using repeat cycle length = {total_weeks} (LCM of shift patterns)")
     else:
         total_weeks = args.weeks
 
-    # Add extension based on format if not present
-    import os
-    out_path = args.out
-    base, ext = os.path.splitext(out_path)
-    
-    # Remove extension if present and add the correct one based on format
-    if ext.lower() in ['.csv', '.xlsx']:
-        out_path = base
-    
-    out_path = f"{out_path}.{args.format}"
+    # Replace a .csv/.xlsx extension if present, otherwise append the format's
+    # one. Plain string handling keeps the path as typed: Path() would drop a
+    # leading "./" and has no name to extend for "." or "".
+    base, ext = os.path.splitext(args.out)
+    if ext.lower() not in (".csv", ".xlsx"):
+        base = args.out
+    out_path = f"{base}.{args.format}"
 
     # Pivot output to match spreadsheet-like format
     if args.format == "xlsx":
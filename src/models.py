@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import dataclasses
-from typing import List, Dict, Optional
+from typing import Dict, List, Optional
 
 WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
 
-DAY = "DAY"
-NIGHT = "NIGHT"
-OFF = "OFF"
+# Assignment kinds are small ints; they are compared on every constraint check.
+# Use ASSIGNMENT_LABELS to render them in output files.
+DAY = 0
+NIGHT = 1
+OFF = 2
+ASSIGNMENT_LABELS = ("DAY", "NIGHT", "OFF")
 
 @dataclasses.dataclass(frozen=True)
 class TimeRange:
@@ -37,7 +40,7 @@ class ShiftConfig:
     min_night_staff_wednesday: Optional[int] = None
     max_night_staff_wednesday: Optional[int] = None
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True, slots=True)
 class RulesConfig:
     max_shifts_in_row: int
     max_days_off: int
@@ -56,38 +59,48 @@ class Config:
     shifts: List[ShiftConfig]
     rules: RulesConfig
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class PersonState:
     name: str
-    streak_type: Optional[str] = None  # DAY/NIGHT/OFF
+    streak_type: Optional[int] = None  # DAY/NIGHT/OFF
     streak_len: int = 0
-    last_assignment: Optional[str] = None
+    last_assignment: Optional[int] = None
     night_cooldown_remaining: int = 0
     working_streak_len: int = 0  # consecutive DAYS or NIGHTS regardless of type
-    previous_assignment: Optional[str] = None  # Track previous state for transition detection
+    previous_assignment: Optional[int] = None  # Track previous state for transition detection
     weekend_count: int = 0  # Track number of weekends worked
 
-    def can_assign(self, assign: str, rules: RulesConfig) -> bool:
-        # If in mandatory cooldown after NIGHT streak, only OFF is allowed
-        if self.night_cooldown_remaining > 0 and assign != OFF:
-            return False
-        # Unified max consecutive working shifts (DAY or NIGHT)
-        if assign in (DAY, NIGHT):
-            if self.working_streak_len >= rules.max_shifts_in_row:
-                return False
-            # If currently on OFF streak, check if we've met minimum days off requirement
-            if self.streak_type == OFF and self.streak_len < rules.min_days_off:
-                return False
+    # Bit a is set when assignment a is allowed; rebuilt by apply() for the
+    # rules it was given, so can_assign() is a single shift-and-mask. The
+    # cache is only refreshed there: change the fields above through apply(),
+    # never directly, or can_assign() answers for the old state.
+    legal_mask: int = dataclasses.field(default=0, init=False, repr=False, compare=False)
+    mask_rules: Optional[RulesConfig] = dataclasses.field(default=None, init=False, repr=False, compare=False)
+
+    def can_assign(self, assign: int, rules: RulesConfig) -> bool:
+        if rules is not self.mask_rules:
+            self._update_legal_mask(rules)
+        return bool(self.legal_mask >> assign & 1)
+
+    def _update_legal_mask(self, rules: RulesConfig) -> None:
+        mask = (1 << DAY) | (1 << NIGHT) | (1 << OFF)
+        # Only OFF is allowed during the cooldown after a NIGHT streak, after
+        # max consecutive working shifts (DAY or NIGHT), or before the minimum
+        # days off of the current OFF streak are met
+        if (self.night_cooldown_remaining > 0
+                or self.working_streak_len >= rules.max_shifts_in_row
+                or (self.streak_type == OFF and self.streak_len < rules.min_days_off)):
+            mask = 1 << OFF
         # Check max_days_off: if already OFF for too long, must work
-        if assign == OFF:
-            if self.streak_type == OFF and self.streak_len >= rules.max_days_off:
-                return False
+        if self.streak_type == OFF and self.streak_len >= rules.max_days_off:
+            mask &= ~(1 << OFF)
         # Cross-type immediate constraints
-        if assign == DAY and rules.no_day_after_night and self.last_assignment == NIGHT:
-            return False
-        return True
+        if rules.no_day_after_night and self.last_assignment == NIGHT:
+            mask &= ~(1 << DAY)
+        self.legal_mask = mask
+        self.mask_rules = rules
 
-    def apply(self, assign: str, rules: Optional[RulesConfig] = None) -> None:
+    def apply(self, assign: int, rules: Optional[RulesConfig] = None) -> None:
         # Store previous before updating
         self.previous_assignment = self.last_assignment
         
@@ -101,7 +114,7 @@ class PersonState:
         self.last_assignment = assign
         
         # Maintain unified working streak length across DAY/NIGHT
-        if assign in (DAY, NIGHT):
+        if assign != OFF:
             self.working_streak_len += 1
         else:
             self.working_streak_len = 0
@@ -116,12 +129,20 @@ class PersonState:
             if assign == OFF and self.night_cooldown_remaining > 0:
                 self.night_cooldown_remaining -= 1
 
-@dataclasses.dataclass
+            self._update_legal_mask(rules)
+        else:
+            self.mask_rules = None
+
+@dataclasses.dataclass(slots=True)
 class DayPlan:
     weekday_index: int  # 0..6
-    assignments: Dict[str, List[str]]  # {DAY: [names], NIGHT: [names], OFF: [names]}
+    assignments: List[List[str]]  # [DAY names, NIGHT names, OFF names], indexed by DAY/NIGHT/OFF
 
-@dataclasses.dataclass
+    def assignments_by_label(self) -> Dict[str, List[str]]:
+        """Assignments keyed by "DAY"/"NIGHT"/"OFF", the shape `assignments` had before the int codes."""
+        return dict(zip(ASSIGNMENT_LABELS, self.assignments))
+
+@dataclasses.dataclass(slots=True)
 class WeekPlan:
     week_index: int  # pattern index
     days: List[DayPlan]  # length 7
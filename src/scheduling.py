@@ -1,20 +1,46 @@
 from __future__ import annotations
 
 import csv
+import dataclasses
 import datetime as dt
-from typing import List, Dict, Tuple
-from copy import deepcopy
+import functools
+import heapq
+import itertools
+from typing import Callable, List, Dict, Iterator, Sequence, Tuple
 from .models import (
-    WEEKDAYS, DAY, NIGHT, OFF,
+    WEEKDAYS, DAY, NIGHT, OFF, ASSIGNMENT_LABELS,
     ShiftConfig, RulesConfig, PersonState,
     DayPlan, WeekPlan, Config
 )
 
 
 def compute_min_pattern_weeks(people_count: int, rules: RulesConfig) -> int:
-    # Heuristic lower bound
+    # OFF-day bounds are validated per week, not per cycle, so adding weeks
+    # never makes a failing week pass: there is no bound above the 2-week minimum.
+    # Shifts that can never pass are detected by _weekly_off_infeasible instead.
     return 2
 
+
+def _weekly_off_infeasible(shift: ShiftConfig, rules: RulesConfig) -> bool:
+    """
+    True if no pattern length can satisfy the weekly OFF upper bound.
+
+    Each day the allocator staffs at most max(target, regular min_*_staff) per
+    type: backfills fill up to the daily target and then up to the shift's
+    regular minimums, which can exceed weekend/Wednesday override targets. If
+    even that leaves more than N*(max_days_off + 1) OFF person-days a week (the
+    relaxed bound allocate_week_pattern checks), someone is over the limit in
+    every week by pigeonhole, whatever the pattern length.
+    """
+    people_count = len(shift.people)
+    staffed = 0
+    for d in range(7):
+        day_count, night_count = target_daily_staff_counts(shift, rules, d)
+        most = max(day_count, shift.min_day_staff) + max(night_count, shift.min_night_staff)
+        # An all-OFF day still gets one person from the fallback assignment
+        staffed += min(people_count, max(most, 1))
+    return 7 * people_count - staffed > people_count * (rules.max_days_off + 1)
+
 def _is_feasible(shift: ShiftConfig, rules: RulesConfig) -> bool:
     """
     Quick feasibility check:
@@ -38,12 +64,11 @@ def _relax_optional_prefs(shift: ShiftConfig, rules: RulesConfig) -> Tuple[Shift
     - Disable Wednesday overfill
     - Clear Friday priority names
     """
-    s2 = deepcopy(shift)
-    r2 = deepcopy(rules)
-    s2.wednesday_day_overfill_count = 0
-    r2.wednesday_day_overfill = False
-    r2.friday_shift2_priority_names = []
-    return s2, r2
+    # ShiftConfig has no Wednesday overfill field (nothing reads one), and the
+    # allocator never mutates the shift, so it is returned as is rather than
+    # deep-copied. RulesConfig is frozen and has no overfill flag either.
+    r2 = dataclasses.replace(rules, friday_shift2_priority_names=[])
+    return shift, r2
 
 
 def _total_daily_staff(people_count: int, rules: RulesConfig) -> int:
@@ -121,13 +146,74 @@ def target_daily_staff_counts(shift: ShiftConfig, rules: RulesConfig, weekday_in
     return day_count, night_count
 
 
+def _rank_candidates(people: Sequence[str], person_states: Dict[str, PersonState], rules: RulesConfig,
+                     assign_type: int, shift_hours: float, pattern_total_hours: Dict[str, float],
+                     pattern_weeks: int, is_friday: bool, priority_set: frozenset,
+                     max_hours: float, equal_hours: bool, limit: int) -> List[str]:
+    """Return up to `limit` people eligible for `assign_type` today, best candidate first."""
+    scored: List[Tuple[str, float]] = []
+    for p in people:
+        st = person_states[p]
+        if not st.can_assign(assign_type, rules):
+            continue
+        # Respect pattern average max hours cap: check if adding today would exceed average
+        projected_total = pattern_total_hours[p] + shift_hours
+        projected_avg = projected_total / pattern_weeks if pattern_weeks > 0 else 0
+        if projected_avg > max_hours:
+            continue
+
+        # When require_equal_hours is enabled, make pattern hours the PRIMARY criteria
+        if equal_hours:
+            # Sort primarily by pattern hours, then by other factors
+            scored.append((p, (pattern_total_hours[p], st.streak_len * (st.streak_type == assign_type))))
+        else:
+            # Boolean factors instead of conditional expressions: same values, no branches
+            penalty = st.streak_len * (st.streak_type == assign_type)
+            bonus = -2 * (is_friday and p in priority_set)
+            # Fairness: prefer those with fewer total pattern hours to equalize workload
+            fairness = pattern_total_hours[p] / 10.0
+            scored.append((p, penalty + 0.5 * (st.last_assignment == assign_type) - bonus + fairness))
+    # Only the top `limit` are used, so a partial selection beats a full sort
+    return [p for p, _ in heapq.nsmallest(limit, scored, key=lambda x: (x[1], x[0]))]
+
+
+def _rank_night(cands: Sequence[str], person_states: Dict[str, PersonState], rules: RulesConfig,
+                night_hours: float, pattern_total_hours: Dict[str, float], pattern_weeks: int,
+                weekend_counts: Dict[str, int], is_weekend: bool, max_hours: float,
+                equal_hours: bool, limit: int) -> List[str]:
+    """Return up to `limit` NIGHT candidates, additionally spreading weekend nights across people."""
+    scored: List[Tuple[str, float]] = []
+    for p in cands:
+        st = person_states[p]
+        if not st.can_assign(NIGHT, rules):
+            continue
+        projected_total = pattern_total_hours[p] + night_hours
+        projected_avg = projected_total / pattern_weeks if pattern_weeks > 0 else 0
+        if projected_avg > max_hours:
+            continue
+
+        # When require_equal_hours is enabled, make pattern hours the PRIMARY criteria
+        if equal_hours:
+            # Sort by: 1) pattern hours, 2) weekend count (fewer is better), 3) streak
+            weekend_penalty = weekend_counts[p] * 0.1 * is_weekend
+            scored.append((p, (pattern_total_hours[p], weekend_penalty, st.streak_len * (st.streak_type == NIGHT))))
+        else:
+            penalty = st.streak_len * (st.streak_type == NIGHT)
+            fairness = pattern_total_hours[p] / 10.0
+            weekend_penalty = weekend_counts[p] * 0.5 * is_weekend
+            scored.append((p, penalty + 0.5 * (st.last_assignment == NIGHT) + fairness + weekend_penalty))
+    # Only the top `limit` are used, so a partial selection beats a full sort
+    return [p for p, _ in heapq.nsmallest(limit, scored, key=lambda x: (x[1], x[0]))]
+
+
 def allocate_week_pattern(shift: ShiftConfig, rules: RulesConfig, pattern_weeks: int, 
                          global_pattern_hours: Dict[str, float] = None,
                          global_weekend_counts: Dict[str, int] = None) -> List[WeekPlan]:
     # If infeasible under current optional prefs, relax them
     if not _is_feasible(shift, rules):
         shift, rules = _relax_optional_prefs(shift, rules)
-    people = list(shift.people)
+    # Read-only roster: a tuple avoids a list copy and iterates slightly faster
+    people = tuple(shift.people)
     person_states: Dict[str, PersonState] = {p: PersonState(name=p) for p in people}
     week_patterns: List[WeekPlan] = []
 
@@ -153,50 +239,34 @@ def allocate_week_pattern(shift: ShiftConfig, rules: RulesConfig, pattern_weeks:
             if p not in weekend_counts:
                 weekend_counts[p] = 0
 
+    # Staffing targets and Friday priorities only depend on the shift/rules and
+    # weekday, so compute them once instead of per (week, day)
+    daily_targets = [target_daily_staff_counts(shift, rules, d) for d in range(7)]
+    priority_set = frozenset(rules.friday_shift2_priority_names if shift.name.lower() == "shift 2" else ())
+
+    # Relaxed weekly OFF bounds; the multi-week pattern absorbs the variance
+    min_off, max_off = rules.min_days_off - 1, rules.max_days_off + 1
+    # Rule values used by the rankers and backfills below; they don't change per day
+    max_hours = float(rules.target_weekly_hours_max)
+    equal_hours = rules.require_equal_hours
+    # Zeroed per-week counters; copying a prebuilt dict beats a comprehension
+    zero_offs: Dict[str, int] = dict.fromkeys(people, 0)
+    zero_hours: Dict[str, float] = dict.fromkeys(people, 0.0)
+
     for w in range(pattern_weeks):
         days: List[DayPlan] = []
-        off_counter: Dict[str, int] = {p: 0 for p in people}
+        off_counter = zero_offs.copy()
         # Track per-person hours within the current week to improve fairness
-        week_hours: Dict[str, float] = {p: 0.0 for p in people}
+        week_hours = zero_hours.copy()
 
         for d in range(7):
-            day_count, night_count = target_daily_staff_counts(shift, rules, d)
+            day_count, night_count = daily_targets[d]
 
             is_friday = (d == 4)
-            priority_names = rules.friday_shift2_priority_names if shift.name.lower() == "shift 2" else []
 
-            def rank_candidates(assign_type: str) -> List[str]:
-                scored: List[Tuple[str, float]] = []
-                for p in people:
-                    st = person_states[p]
-                    if not st.can_assign(assign_type, rules):
-                        continue
-                    # Respect pattern average max hours cap: check if adding today would exceed average
-                    if assign_type == DAY and hasattr(rules, "target_weekly_hours_max"):
-                        projected_total = pattern_total_hours[p] + day_hours
-                        projected_avg = projected_total / pattern_weeks if pattern_weeks > 0 else 0
-                        if projected_avg > float(rules.target_weekly_hours_max):
-                            continue
-                    if assign_type == NIGHT and hasattr(rules, "target_weekly_hours_max"):
-                        projected_total = pattern_total_hours[p] + night_hours
-                        projected_avg = projected_total / pattern_weeks if pattern_weeks > 0 else 0
-                        if projected_avg > float(rules.target_weekly_hours_max):
-                            continue
-                    
-                    # When require_equal_hours is enabled, make pattern hours the PRIMARY criteria
-                    if hasattr(rules, 'require_equal_hours') and rules.require_equal_hours:
-                        # Sort primarily by pattern hours, then by other factors
-                        scored.append((p, (pattern_total_hours[p], st.streak_len if st.streak_type == assign_type else 0)))
-                    else:
-                        penalty = st.streak_len if st.streak_type == assign_type else 0
-                        bonus = -2 if (is_friday and p in priority_names) else 0
-                        # Fairness: prefer those with fewer total pattern hours to equalize workload
-                        fairness = pattern_total_hours[p] / 10.0
-                        scored.append((p, penalty + (0 if st.last_assignment != assign_type else 0.5) - bonus + fairness))
-                scored.sort(key=lambda x: (x[1], x[0]))
-                return [p for p, _ in scored]
-
-            day_members: List[str] = rank_candidates(DAY)[:day_count]
+            day_members: List[str] = _rank_candidates(
+                people, person_states, rules, DAY, day_hours, pattern_total_hours,
+                pattern_weeks, is_friday, priority_set, max_hours, equal_hours, day_count)
             is_weekend = (d >= 5)  # Saturday or Sunday
             for p in day_members:
                 person_states[p].apply(DAY, rules)
@@ -206,35 +276,14 @@ def allocate_week_pattern(shift: ShiftConfig, rules: RulesConfig, pattern_weeks:
                 if is_weekend:
                     weekend_counts[p] += 1
 
-            night_candidates = [p for p in people if p not in day_members]
-
-            def rank_night(cands: List[str]) -> List[str]:
-                scored: List[Tuple[str, float]] = []
-                is_weekend = (d >= 5)  # Saturday or Sunday
-                for p in cands:
-                    st = person_states[p]
-                    if not st.can_assign(NIGHT, rules):
-                        continue
-                    if hasattr(rules, "target_weekly_hours_max"):
-                        projected_total = pattern_total_hours[p] + night_hours
-                        projected_avg = projected_total / pattern_weeks if pattern_weeks > 0 else 0
-                        if projected_avg > float(rules.target_weekly_hours_max):
-                            continue
-                    
-                    # When require_equal_hours is enabled, make pattern hours the PRIMARY criteria
-                    if hasattr(rules, 'require_equal_hours') and rules.require_equal_hours:
-                        # Sort by: 1) pattern hours, 2) weekend count (fewer is better), 3) streak
-                        weekend_penalty = weekend_counts[p] * 0.1 if is_weekend else 0
-                        scored.append((p, (pattern_total_hours[p], weekend_penalty, st.streak_len if st.streak_type == NIGHT else 0)))
-                    else:
-                        penalty = st.streak_len if st.streak_type == NIGHT else 0
-                        fairness = pattern_total_hours[p] / 10.0
-                        weekend_penalty = weekend_counts[p] * 0.5 if is_weekend else 0
-                        scored.append((p, penalty + (0 if st.last_assignment != NIGHT else 0.5) + fairness + weekend_penalty))
-                scored.sort(key=lambda x: (x[1], x[0]))
-                return [p for p, _ in scored]
-
-            night_members = rank_night(night_candidates)[:night_count]
+            day_set = set(day_members)
+            night_candidates = [p for p in people if p not in day_set]
+            night_members = _rank_night(
+                night_candidates, person_states, rules, night_hours, pattern_total_hours,
+                pattern_weeks, weekend_counts, is_weekend, max_hours, equal_hours, night_count)
+            # Sets mirror day_members/night_members for O(1) membership checks;
+            # the lists keep assignment order for the output
+            night_set = set(night_members)
             for p in night_members:
                 person_states[p].apply(NIGHT, rules)
                 week_hours[p] += night_hours
@@ -243,11 +292,11 @@ def allocate_week_pattern(shift: ShiftConfig, rules: RulesConfig, pattern_weeks:
                     weekend_counts[p] += 1
 
             # Helper to try assign OFF people to a type up to a needed count
-            def _assign_from_off(assign_type: str, needed: int) -> int:
-                off_pool = [x for x in people if x not in day_members and x not in night_members]
+            def _assign_from_off(assign_type: int, needed: int) -> int:
+                off_pool = [x for x in people if x not in day_set and x not in night_set]
                 
                 # When require_equal_hours is enabled, sort by pattern hours to prioritize those with fewer hours
-                if hasattr(rules, 'require_equal_hours') and rules.require_equal_hours:
+                if equal_hours:
                     off_pool.sort(key=lambda p: pattern_total_hours[p])
                 
                 for p in off_pool:
@@ -256,23 +305,19 @@ def allocate_week_pattern(shift: ShiftConfig, rules: RulesConfig, pattern_weeks:
                     st = person_states[p]
                     if st.can_assign(assign_type, rules):
                         # Respect pattern average max-hours cap when backfilling
-                        if assign_type == DAY and hasattr(rules, "target_weekly_hours_max"):
-                            projected_total = pattern_total_hours[p] + day_hours
-                            projected_avg = projected_total / pattern_weeks if pattern_weeks > 0 else 0
-                            if projected_avg > float(rules.target_weekly_hours_max):
-                                continue
-                        if assign_type == NIGHT and hasattr(rules, "target_weekly_hours_max"):
-                            projected_total = pattern_total_hours[p] + night_hours
-                            projected_avg = projected_total / pattern_weeks if pattern_weeks > 0 else 0
-                            if projected_avg > float(rules.target_weekly_hours_max):
-                                continue
+                        projected_total = pattern_total_hours[p] + (day_hours if assign_type == DAY else night_hours)
+                        projected_avg = projected_total / pattern_weeks if pattern_weeks > 0 else 0
+                        if projected_avg > max_hours:
+                            continue
                         person_states[p].apply(assign_type, rules)
                         if assign_type == DAY:
                             day_members.append(p)
+                            day_set.add(p)
                             week_hours[p] += day_hours
                             pattern_total_hours[p] += day_hours
                         else:
                             night_members.append(p)
+                            night_set.add(p)
                             week_hours[p] += night_hours
                             pattern_total_hours[p] += night_hours
                         if is_weekend:
@@ -287,9 +332,10 @@ def allocate_week_pattern(shift: ShiftConfig, rules: RulesConfig, pattern_weeks:
                 needed = _assign_from_off(NIGHT, needed)
                 # If still short, try moving from DAY if above min_day_staff
                 if needed > 0:
-                    movable = [p for p in day_members if len(day_members) > shift.min_day_staff]
+                    # Snapshot: moving shrinks day_members while this is iterated
+                    movable = list(day_members) if len(day_members) > shift.min_day_staff else []
                     # When require_equal_hours, prioritize moving people with MORE hours
-                    if hasattr(rules, 'require_equal_hours') and rules.require_equal_hours:
+                    if equal_hours:
                         movable.sort(key=lambda p: pattern_total_hours[p], reverse=True)
                     for p in movable:
                         if needed <= 0:
@@ -299,16 +345,17 @@ def allocate_week_pattern(shift: ShiftConfig, rules: RulesConfig, pattern_weeks:
                         # Simple approach: if can assign NIGHT, switch
                         if st.can_assign(NIGHT, rules):
                             # Check pattern average (person already has DAY hours assigned)
-                            if hasattr(rules, "target_weekly_hours_max"):
-                                projected_total = pattern_total_hours[p] - day_hours + night_hours
-                                projected_avg = projected_total / pattern_weeks if pattern_weeks > 0 else 0
-                                if projected_avg > float(rules.target_weekly_hours_max):
-                                    continue
+                            projected_total = pattern_total_hours[p] - day_hours + night_hours
+                            projected_avg = projected_total / pattern_weeks if pattern_weeks > 0 else 0
+                            if projected_avg > max_hours:
+                                continue
                             # Remove DAY assignment effect by resetting last assignment; re-applying below
                             # For simplicity, we won't undo streak counters here; instead prefer future assignment fairness
                             day_members.remove(p)
+                            day_set.discard(p)
                             person_states[p].apply(NIGHT, rules)
                             night_members.append(p)
+                            night_set.add(p)
                             week_hours[p] = week_hours[p] - day_hours + night_hours
                             pattern_total_hours[p] = pattern_total_hours[p] - day_hours + night_hours
                             needed -= 1
@@ -320,9 +367,10 @@ def allocate_week_pattern(shift: ShiftConfig, rules: RulesConfig, pattern_weeks:
                 needed_n = _assign_from_off(NIGHT, needed_n)
                 if needed_n > 0:
                     # Move from DAY if possible
-                    movable = [p for p in day_members if len(day_members) > shift.min_day_staff]
+                    # Snapshot: moving shrinks day_members while this is iterated
+                    movable = list(day_members) if len(day_members) > shift.min_day_staff else []
                     # When require_equal_hours, prioritize moving people with MORE hours
-                    if hasattr(rules, 'require_equal_hours') and rules.require_equal_hours:
+                    if equal_hours:
                         movable.sort(key=lambda p: pattern_total_hours[p], reverse=True)
                     for p in movable:
                         if needed_n <= 0:
@@ -330,14 +378,15 @@ def allocate_week_pattern(shift: ShiftConfig, rules: RulesConfig, pattern_weeks:
                         st = person_states[p]
                         if st.can_assign(NIGHT, rules):
                             # Check pattern average (person already has DAY hours assigned)
-                            if hasattr(rules, "target_weekly_hours_max"):
-                                projected_total = pattern_total_hours[p] - day_hours + night_hours
-                                projected_avg = projected_total / pattern_weeks if pattern_weeks > 0 else 0
-                                if projected_avg > float(rules.target_weekly_hours_max):
-                                    continue
+                            projected_total = pattern_total_hours[p] - day_hours + night_hours
+                            projected_avg = projected_total / pattern_weeks if pattern_weeks > 0 else 0
+                            if projected_avg > max_hours:
+                                continue
                             day_members.remove(p)
+                            day_set.discard(p)
                             person_states[p].apply(NIGHT, rules)
                             night_members.append(p)
+                            night_set.add(p)
                             week_hours[p] = week_hours[p] - day_hours + night_hours
                             pattern_total_hours[p] = pattern_total_hours[p] - day_hours + night_hours
                             needed_n -= 1
@@ -346,10 +395,10 @@ def allocate_week_pattern(shift: ShiftConfig, rules: RulesConfig, pattern_weeks:
                     eligible_no_constraints = sum(1 for p in people if person_states[p].can_assign(NIGHT, rules))
                     in_cooldown = sum(1 for p in people if person_states[p].night_cooldown_remaining > 0)
                     already_day = len(day_members)
-                    would_exceed_hours = sum(1 for p in people if p not in day_members and person_states[p].can_assign(NIGHT, rules) and hasattr(rules, "target_weekly_hours_max") and (pattern_total_hours[p] + night_hours) / pattern_weeks > float(rules.target_weekly_hours_max))
+                    would_exceed_hours = sum(1 for p in people if p not in day_set and person_states[p].can_assign(NIGHT, rules) and (pattern_total_hours[p] + night_hours) / pattern_weeks > max_hours)
                     print(f"WARNING {WEEKDAYS[d]}: Cannot meet min_night_staff={shift.min_night_staff} (short by {needed_n}).")
                     print(f"  Already on DAY: {already_day}, In cooldown: {in_cooldown}, Would exceed max hours: {would_exceed_hours}")
-                    print(f"  Available OFF people: {len([p for p in people if p not in day_members and p not in night_members])}")
+                    print(f"  Available OFF people: {len([p for p in people if p not in day_set and p not in night_set])}")
                     # Continue with what we have rather than failing
                     # This allows the pattern to complete even if some days are understaffed
 
@@ -359,9 +408,9 @@ def allocate_week_pattern(shift: ShiftConfig, rules: RulesConfig, pattern_weeks:
                 needed_d = _assign_from_off(DAY, needed_d)
                 if needed_d > 0:
                     # Move from NIGHT if possible
-                    movable = [p for p in night_members if len(night_members) > shift.min_night_staff]
+                    movable = list(night_members) if len(night_members) > shift.min_night_staff else []
                     # When require_equal_hours, prioritize moving people with MORE hours
-                    if hasattr(rules, 'require_equal_hours') and rules.require_equal_hours:
+                    if equal_hours:
                         movable.sort(key=lambda p: pattern_total_hours[p], reverse=True)
                     for p in movable:
                         if needed_d <= 0:
@@ -369,14 +418,15 @@ def allocate_week_pattern(shift: ShiftConfig, rules: RulesConfig, pattern_weeks:
                         st = person_states[p]
                         if st.can_assign(DAY, rules):
                             # Check pattern average (person already has NIGHT hours assigned)
-                            if hasattr(rules, "target_weekly_hours_max"):
-                                projected_total = pattern_total_hours[p] - night_hours + day_hours
-                                projected_avg = projected_total / pattern_weeks if pattern_weeks > 0 else 0
-                                if projected_avg > float(rules.target_weekly_hours_max):
-                                    continue
+                            projected_total = pattern_total_hours[p] - night_hours + day_hours
+                            projected_avg = projected_total / pattern_weeks if pattern_weeks > 0 else 0
+                            if projected_avg > max_hours:
+                                continue
                             night_members.remove(p)
+                            night_set.discard(p)
                             person_states[p].apply(DAY, rules)
                             day_members.append(p)
+                            day_set.add(p)
                             week_hours[p] = week_hours[p] - night_hours + day_hours
                             pattern_total_hours[p] = pattern_total_hours[p] - night_hours + day_hours
                             needed_d -= 1
@@ -385,7 +435,7 @@ def allocate_week_pattern(shift: ShiftConfig, rules: RulesConfig, pattern_weeks:
                     print(f"WARNING {WEEKDAYS[d]}: Cannot meet min_day_staff={shift.min_day_staff} (short by {needed_d})")
                     # Continue with what we have rather than failing
 
-            off_members = [p for p in people if p not in day_members and p not in night_members]
+            off_members = [p for p in people if p not in day_set and p not in night_set]
             # Ensure at least one assigned this day for the team; if none, try to move one OFF to DAY or NIGHT
             if not day_members and not night_members and off_members:
                 # Try assign someone to DAY first if possible
@@ -404,11 +454,10 @@ def allocate_week_pattern(shift: ShiftConfig, rules: RulesConfig, pattern_weeks:
                     for p in off_members:
                         st = person_states[p]
                         if st.can_assign(NIGHT, rules):
-                            if hasattr(rules, "target_weekly_hours_max"):
-                                projected_total = pattern_total_hours[p] + night_hours
-                                projected_avg = projected_total / pattern_weeks if pattern_weeks > 0 else 0
-                                if projected_avg > float(rules.target_weekly_hours_max):
-                                    continue
+                            projected_total = pattern_total_hours[p] + night_hours
+                            projected_avg = projected_total / pattern_weeks if pattern_weeks > 0 else 0
+                            if projected_avg > max_hours:
+                                continue
                             person_states[p].apply(NIGHT, rules)
                             night_members.append(p)
                             off_members.remove(p)
@@ -422,15 +471,14 @@ def allocate_week_pattern(shift: ShiftConfig, rules: RulesConfig, pattern_weeks:
 
             days.append(DayPlan(
                 weekday_index=d,
-                assignments={DAY: day_members, NIGHT: night_members, OFF: off_members}
+                assignments=[day_members, night_members, off_members]
             ))
 
         for p in people:
             off_days = off_counter[p]
-            # Allow small deviations and let multi-week pattern absorb variance
-            if off_days < rules.min_days_off - 1 or off_days > rules.max_days_off + 1:
+            if off_days < min_off or off_days > max_off:
                 raise ValueError(
-                    f"Weekly OFF days for {p} in {shift.name} = {off_days} violates relaxed bounds [{rules.min_days_off - 1}, {rules.max_days_off + 1}]"
+                    f"Weekly OFF days for {p} in {shift.name} = {off_days} violates relaxed bounds [{min_off}, {max_off}]"
                 )
 
         week_patterns.append(WeekPlan(week_index=w, days=days))
@@ -442,19 +490,18 @@ def _pattern_meets_mins(pattern: List[WeekPlan], shift: ShiftConfig) -> bool:
     Check if pattern meets minimum staffing requirements.
     More lenient: allow occasional understaffing if constraints prevent meeting mins.
     """
+    # Allow up to 20% of days to be understaffed due to constraint conflicts;
+    # integer division gives the same bound as int(total_days * 0.2)
+    tolerance = len(pattern) * 7 // 5
+    min_day, min_night = shift.min_day_staff, shift.min_night_staff
     violations = 0
-    total_days = len(pattern) * 7
-    
     for week in pattern:
         for day in week.days:
-            if len(day.assignments[DAY]) < shift.min_day_staff:
-                violations += 1
-            if len(day.assignments[NIGHT]) < shift.min_night_staff:
-                violations += 1
-    
-    # Allow up to 20% of days to be understaffed due to constraint conflicts
-    tolerance = int(total_days * 0.2)
-    return violations <= tolerance
+            violations += (len(day.assignments[DAY]) < min_day) + (len(day.assignments[NIGHT]) < min_night)
+        # The count only grows, so stop once the tolerance is exceeded
+        if violations > tolerance:
+            return False
+    return True
 
 def _compute_avg_week_hours(pattern: List[WeekPlan], shift: ShiftConfig) -> Dict[str, float]:
     # average hours per person across the pattern (weeks)
@@ -472,7 +519,7 @@ def _compute_avg_week_hours(pattern: List[WeekPlan], shift: ShiftConfig) -> Dict
 
 def _check_equal_hours(pattern: List[WeekPlan], shift: ShiftConfig, rules: RulesConfig) -> bool:
     """Check if all people have equal average hours (within 0.5 hour tolerance)"""
-    if not hasattr(rules, 'require_equal_hours') or not rules.require_equal_hours:
+    if not rules.require_equal_hours:
         return True
     
     avg_hours = _compute_avg_week_hours(pattern, shift)
@@ -493,20 +540,25 @@ def _check_equal_hours(pattern: List[WeekPlan], shift: ShiftConfig, rules: Rules
     
     return True
 
+# TimeRange is frozen, so each distinct range is parsed once per process
+@functools.lru_cache(maxsize=256)
 def _hours_for_range(tr: TimeRange) -> float:
     h1, m1 = map(int, tr.start.split(":"))
     h2, m2 = map(int, tr.end.split(":"))
-    t1 = dt.timedelta(hours=h1, minutes=m1)
-    t2 = dt.timedelta(hours=h2, minutes=m2)
-    dur = t2 - t1
-    if dur.total_seconds() <= 0:
-        dur = (dt.timedelta(days=1) - t1) + t2
-    return dur.total_seconds() / 3600.0
+    # Minutes past midnight; a range ending at or before its start runs overnight
+    minutes = ((h2 * 60 + m2) - (h1 * 60 + m1)) % 1440 or 1440
+    return minutes / 60.0
+
+# Rule fields the adjustment pass does not carry over from the configured rules
+_ADJUSTMENT_RESET = {f.name: f.default for f in dataclasses.fields(RulesConfig)
+                     if f.name in ("target_weekly_hours_max", "require_equal_hours")}
 
 def find_smallest_valid_pattern(shift: ShiftConfig, rules: RulesConfig, max_try_weeks: int = 104) -> List[WeekPlan]:
     start = compute_min_pattern_weeks(len(shift.people), rules)
     last_err = None
-    for w in range(start, max_try_weeks + 1):
+    # Skip sweeps that are provably infeasible for every pattern length
+    candidate_weeks = range(0) if _weekly_off_infeasible(shift, rules) else range(start, max_try_weeks + 1)
+    for w in candidate_weeks:
         try:
             pat = allocate_week_pattern(shift, rules, w)
             if _pattern_meets_mins(pat, shift) and _check_equal_hours(pat, shift, rules):
@@ -518,21 +570,15 @@ def find_smallest_valid_pattern(shift: ShiftConfig, rules: RulesConfig, max_try_
             last_err = e
             continue
     # If reached here, try dynamic adjustments to improve hours balance
-    # Clone rules and relax preferred options; adjust max_days_off downward to allow more work
-    adj_rules = RulesConfig(
-        max_shifts_in_row=rules.max_shifts_in_row,
-        max_days_off=rules.max_days_off,
-        min_days_off=rules.min_days_off,
-        no_day_after_night=rules.no_day_after_night,
-        friday_shift2_priority_names=[],
-        wednesday_day_overfill=False,
-        min_days_off_after_night_streak=rules.min_days_off_after_night_streak,
-        target_weekly_hours_min=rules.target_weekly_hours_min,
-        enable_auto_adjust=rules.enable_auto_adjust,
-    )
+    # Clone rules and relax preferred options; adjust max_days_off downward to allow more work.
+    # The hours cap and equal-hours flag go back to their defaults, as in the
+    # hand-built RulesConfig this pass has always used.
+    adj_rules = dataclasses.replace(rules, friday_shift2_priority_names=[], **_ADJUSTMENT_RESET)
     # progressively reduce max_days_off toward min_days_off
     for mdo in range(rules.max_days_off, rules.min_days_off - 1, -1):
-        adj_rules.max_days_off = mdo
+        adj_rules = dataclasses.replace(adj_rules, max_days_off=mdo)
+        if _weekly_off_infeasible(shift, adj_rules):
+            continue
         for w in range(start, max_try_weeks + 1):
             try:
                 pat = allocate_week_pattern(shift, adj_rules, w)
@@ -542,7 +588,7 @@ def find_smallest_valid_pattern(shift: ShiftConfig, rules: RulesConfig, max_try_
                     continue
                 avg_hours = _compute_avg_week_hours(pat, shift)
                 # Accept if average >= configurable target
-                target = rules.target_weekly_hours_min if hasattr(rules, 'target_weekly_hours_min') else 30.0
+                target = rules.target_weekly_hours_min
                 if all(h >= float(target) for h in avg_hours.values()):
                     print(f"Adjusted rules for '{shift.name}': max_days_off={mdo}, disabled Wednesday overfill and Friday priorities, target_weekly_hours_min={target}.")
                     return pat
@@ -552,140 +598,226 @@ def find_smallest_valid_pattern(shift: ShiftConfig, rules: RulesConfig, max_try_
     # As last resort, return a longest attempt even if below target; inform adjustments
     pat = allocate_week_pattern(shift, adj_rules, max_try_weeks)
     avg_hours = _compute_avg_week_hours(pat, shift)
-    target = rules.target_weekly_hours_min if hasattr(rules, 'target_weekly_hours_min') else 30.0
+    target = rules.target_weekly_hours_min
     print(f"Adjusted rules for '{shift.name}' but could not reach {target}h avg for all. max_days_off={adj_rules.max_days_off}. Averages: " + ", ".join(f"{p}:{h:.1f}" for p,h in avg_hours.items()))
     return pat
 
 
+_CSV_SPECIAL = frozenset(',"\r\n')
+
+
+def _csv_plain(value: str) -> bool:
+    # True if csv.writer would emit `value` unquoted
+    return _CSV_SPECIAL.isdisjoint(value)
+
+
 def write_csv(out_path: str, start_date: dt.date, total_weeks: int, shift_patterns: Dict[str, List[WeekPlan]]) -> None:
-    with open(out_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["week_index", "date", "weekday", "shift_name", "shift_type", "members"])
+    # Per pattern day, the weekday label and joined member lists never change
+    # between cycles, so format them once and only vary week index and date.
+    cells: Dict[str, List[List[Tuple[int, str, str, str]]]] = {
+        shift_name: [
+            [(day.weekday_index, WEEKDAYS[day.weekday_index],
+              ";".join(day.assignments[DAY]), ";".join(day.assignments[NIGHT]))
+             for day in pattern_week.days]
+            for pattern_week in patterns
+        ]
+        for shift_name, patterns in shift_patterns.items()
+    }
+
+    header = ["week_index", "date", "weekday", "shift_name", "shift_type", "members"]
+    day_label, night_label = ASSIGNMENT_LABELS[DAY], ASSIGNMENT_LABELS[NIGHT]
+    plain = all(
+        _csv_plain(shift_name) and all(_csv_plain(day_m) and _csv_plain(night_m)
+                                       for week in pattern_cells for _, _, day_m, night_m in week)
+        for shift_name, pattern_cells in cells.items()
+    )
 
+    with open(out_path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+        if plain:
+            # Nothing needs quoting, so format lines directly; this matches
+            # csv.writer's output (including its \r\n terminator) byte for byte.
+            lines: List[str] = [",".join(header) + "\r\n"]
+            for w in range(total_weeks):
+                week_start = start_date + dt.timedelta(weeks=w)
+                dates = [(week_start + dt.timedelta(days=d)).isoformat() for d in range(7)]
+                for shift_name, pattern_cells in cells.items():
+                    for d, weekday, day_members, night_members in pattern_cells[w % len(pattern_cells)]:
+                        prefix = f"{w},{dates[d]},{weekday},{shift_name},"
+                        lines.append(f"{prefix}{day_label},{day_members}\r\n{prefix}{night_label},{night_members}\r\n")
+            f.write("".join(lines))
+            return
+
+        rows: List[list] = [header]
         for w in range(total_weeks):
             week_start = start_date + dt.timedelta(weeks=w)
-            for shift_name, patterns in shift_patterns.items():
-                pattern_week = patterns[w % len(patterns)]
-                for day in pattern_week.days:
-                    day_date = week_start + dt.timedelta(days=day.weekday_index)
-                    writer.writerow([w, day_date.isoformat(), WEEKDAYS[day.weekday_index], shift_name, DAY, ";".join(day.assignments[DAY])])
-                    writer.writerow([w, day_date.isoformat(), WEEKDAYS[day.weekday_index], shift_name, NIGHT, ";".join(day.assignments[NIGHT])])
+            dates = [(week_start + dt.timedelta(days=d)).isoformat() for d in range(7)]
+            for shift_name, pattern_cells in cells.items():
+                for d, weekday, day_members, night_members in pattern_cells[w % len(pattern_cells)]:
+                    rows.append([w, dates[d], weekday, shift_name, day_label, day_members])
+                    rows.append([w, dates[d], weekday, shift_name, night_label, night_members])
+        csv.writer(f).writerows(rows)
 
 
-def write_pivot_csv(out_path: str, total_weeks: int, shift_patterns: Dict[str, List[WeekPlan]], cfg: Config) -> None:
+def _pivot_presence(people: Sequence[str], patterns: List[WeekPlan]) -> Dict[Tuple[str, int], List[Tuple[List[str], int]]]:
     """
-    Writes a pivot-style CSV matching the spreadsheet-like view:
-    - Weeks laid out horizontally with day columns (M..Su) per week.
-    - One row per shift+type, labeled with times and timezone.
-    - Cells contain the semicolon-separated member list for that day.
+    For each (person, DAY/NIGHT), per pattern week: the person's 7 day cells
+    (their name, or "" when not assigned) and how many days they work.
+    """
+    roster = list(dict.fromkeys(people))
+    presence: Dict[Tuple[str, int], List[Tuple[List[str], int]]] = {(p, t): [] for t in (DAY, NIGHT) for p in roster}
+    for week in patterns:
+        for t in (DAY, NIGHT):
+            day_sets = [set(day.assignments[t]) for day in week.days]
+            for p in roster:
+                # One membership test per day feeds both the cells and the count
+                present = [p in members for members in day_sets]
+                presence[(p, t)].append(([p if on else "" for on in present], sum(present)))
+    return presence
+
+
+def _pivot_combined(people: Sequence[str], patterns: List[WeekPlan], day_h: float, night_h: float) -> Dict[str, List[float]]:
+    """
+    For each person, their combined DAY+NIGHT hours in every pattern week.
 
-    Note: CSV cannot merge cells for week headers; we emit a header row per week.
+    Summed day by day in week order, so the values match adding the hours up
+    while walking the output weeks.
     """
-    # Build header: for each week, 7 day columns
-    week_headers: List[str] = []
-    day_headers: List[str] = []
-    for w in range(total_weeks):
-        week_headers.extend([f"Week {w+1}"] + ["" for _ in range(8)])
-        day_headers.extend(["M", "T", "W", "Th", "F", "S", "Su", "Hours", "Total"])
+    combined: Dict[str, List[float]] = {p: [] for p in people}
+    for week in patterns:
+        day_sets = [(set(day.assignments[DAY]), set(day.assignments[NIGHT])) for day in week.days]
+        for p, weeks in combined.items():
+            hours = 0.0
+            for on_day, on_night in day_sets:
+                if p in on_day:
+                    hours += day_h
+                if p in on_night:
+                    hours += night_h
+            weeks.append(hours)
+    return combined
 
-    rows: List[List[str]] = []
 
-    # For deterministic ordering: list the first team (first shift), then the second, etc.
-    for shift in cfg.shifts:
-        patterns = shift_patterns[shift.name]
+_PIVOT_WEEK_COLUMNS = ("M", "T", "W", "Th", "F", "S", "Su", "Hours", "Total")
 
-        def _country_code(name: str) -> str:
-            first = name.split()[0].lower()
-            return {
-                "lithuania": "LT",
-                "indonesia": "ID",
-            }.get(first, first[:2].upper())
 
-        def _short_time(t: str) -> str:
-            # Convert HH:MM to HH
-            return t.split(":")[0]
+def _pivot_headers(total_weeks: int) -> Tuple[List[str], List[str]]:
+    """Week title row and day/Hours/Total row for the per-week pivot columns."""
+    pad = [""] * (len(_PIVOT_WEEK_COLUMNS) - 1)
+    week_headers = list(itertools.chain.from_iterable([f"Week {w+1}", *pad] for w in range(total_weeks)))
+    return week_headers, list(_PIVOT_WEEK_COLUMNS) * total_weeks
 
-        def base_label(assign_type: str) -> str:
-            code = _country_code(shift.name)
-            shift_num = "S1" if assign_type == DAY else "S2"
-            time_range = f"{_short_time(shift.day_shift.start)}-{_short_time(shift.day_shift.end)}" if assign_type == DAY else f"{_short_time(shift.night_shift.start)}-{_short_time(shift.night_shift.end)}"
-            return f"{code} {shift_num}: {time_range}"
 
-        # Emit one row per person per assignment type, showing only that person's presence for each day
-        # Helper: compute hours per assignment type
-        def _hours_for(assign_type: str) -> float:
-            def parse_hhmm(s: str):
-                h, m = s.split(":"); return int(h), int(m)
-            sh = shift.day_shift if assign_type == DAY else shift.night_shift
-            h1, m1 = parse_hhmm(sh.start)
-            h2, m2 = parse_hhmm(sh.end)
-            t1 = dt.timedelta(hours=h1, minutes=m1)
-            t2 = dt.timedelta(hours=h2, minutes=m2)
-            dur = t2 - t1
-            if dur.total_seconds() <= 0:
-                dur = (dt.timedelta(days=1) - t1) + t2
-            return dur.total_seconds() / 3600.0
+# Known team prefixes; other names fall back to their first two letters
+_COUNTRY_CODES = {
+    "lithuania": "LT",
+    "indonesia": "ID",
+}
+
+
+def _country_code(name: str) -> str:
+    first = name.split()[0].lower()
+    return _COUNTRY_CODES.get(first, first[:2].upper())
+
+
+def _short_time(t: str) -> str:
+    # Convert HH:MM to HH
+    return t.split(":")[0]
+
+
+def _pivot_label(shift: ShiftConfig, assign_type: int) -> str:
+    """Row label for a shift's DAY or NIGHT block, e.g. "LT S1: 09-18"."""
+    code = _country_code(shift.name)
+    shift_num = "S1" if assign_type == DAY else "S2"
+    time_range = f"{_short_time(shift.day_shift.start)}-{_short_time(shift.day_shift.end)}" if assign_type == DAY else f"{_short_time(shift.night_shift.start)}-{_short_time(shift.night_shift.end)}"
+    return f"{code} {shift_num}: {time_range}"
+
+
+def _format_hours(hours: float) -> str:
+    return f"{hours:.1f}"
+
+
+def _pivot_rows(total_weeks: int, shift_patterns: Dict[str, List[WeekPlan]], cfg: Config,
+                hours_cell: Callable[[float], object] = _format_hours) -> Iterator[Tuple[int, int, list]]:
+    """
+    Yield (shift index, DAY/NIGHT, row) for every pivot data row (one per
+    shift+type+person), shared by the CSV and XLSX writers. `hours_cell`
+    turns the Hours/Total/Avg values into cell values.
 
+    The same list is reused for every row, so consume each row before advancing.
+    """
+    # Label column, then 7 days + Hours + Total per week, then Avg
+    row: list = [""] * (1 + 9 * total_weeks + 1)
+    # A NIGHT row for someone never on nights: blank days, 0.0 hours, no Total/Avg
+    idle_night = ([""] * 7 + [hours_cell(0.0), ""]) * total_weeks + [""]
+    # For deterministic ordering: list the first team (first shift), then the second, etc.
+    for shift_index, shift in enumerate(cfg.shifts):
+        patterns = shift_patterns[shift.name]
+        n_pat = len(patterns)
+        # Pattern week shown in each output week
+        week_cycle = [w % n_pat for w in range(total_weeks)]
+        day_h = _hours_for_range(shift.day_shift)
+        night_h = _hours_for_range(shift.night_shift)
+
+        # Emit one row per person per assignment type, showing only that person's presence for each day
+        presence = _pivot_presence(shift.people, patterns)
+        combined_hours = _pivot_combined(shift.people, patterns, day_h, night_h)
         for assign_type in (DAY, NIGHT):
+            type_hours = day_h if assign_type == DAY else night_h
+            label = _pivot_label(shift, assign_type)
             for person in shift.people:
-                row: List[str] = []
-                total_hours_across_weeks = 0.0
-                for w in range(total_weeks):
-                    week = patterns[w % len(patterns)]
-                    worked_days = 0
-                    for d in range(7):
-                        members = week.days[d].assignments[assign_type]
-                        cell = person if person in members else ""
-                        row.append(cell)
-                        if person in members:
-                            worked_days += 1
+                row[0] = label
+                person_weeks = presence[(person, assign_type)]
+                if assign_type == NIGHT and not any(worked_days for _, worked_days in person_weeks):
+                    row[1:] = idle_night
+                    yield shift_index, assign_type, row
+                    continue
+                col = 1
+                # DAY rows also sum the combined hours for the Avg column as they go
+                total_combined_hours = 0.0
+                person_combined = combined_hours[person]
+                # Hours repeat every pattern cycle, so format them once per pattern week
+                hours_text = [hours_cell(worked_days * type_hours) for _, worked_days in person_weeks]
+                combined_text = [hours_cell(hours) for hours in person_combined]
+                for pw in week_cycle:
+                    row[col:col + 7] = person_weeks[pw][0]
+                    col += 7
                     # Append weekly hours column for this assign type
-                    hours = worked_days * _hours_for(assign_type)
-                    row.append(f"{hours:.1f}")
-                    total_hours_across_weeks += hours
+                    row[col] = hours_text[pw]
                     # Total column: only populate for DAY rows; leave blank for NIGHT rows
                     if assign_type == DAY:
-                        combined = 0.0
-                        day_h = _hours_for(DAY)
-                        night_h = _hours_for(NIGHT)
-                        for d in range(7):
-                            if person in week.days[d].assignments[DAY]:
-                                combined += day_h
-                            if person in week.days[d].assignments[NIGHT]:
-                                combined += night_h
-                        row.append(f"{combined:.1f}")
+                        total_combined_hours += person_combined[pw]
+                        row[col + 1] = combined_text[pw]
                     else:
-                        row.append("")
+                        row[col + 1] = ""
+                    col += 2
                 # Calculate average combined hours (DAY+NIGHT) per week across all weeks
                 # Only show in DAY rows
                 if assign_type == DAY:
-                    total_combined_hours = 0.0
-                    day_h = _hours_for(DAY)
-                    night_h = _hours_for(NIGHT)
-                    for w in range(total_weeks):
-                        week = patterns[w % len(patterns)]
-                        week_combined = 0.0
-                        for d in range(7):
-                            if person in week.days[d].assignments[DAY]:
-                                week_combined += day_h
-                            if person in week.days[d].assignments[NIGHT]:
-                                week_combined += night_h
-                        total_combined_hours += week_combined
                     avg_hours = total_combined_hours / total_weeks if total_weeks > 0 else 0.0
-                    row.append(f"{avg_hours:.1f}")
+                    row[col] = hours_cell(avg_hours)
                 else:
-                    row.append("")
-                row.insert(0, base_label(assign_type))
-                rows.append(row)
+                    row[col] = ""
+                yield shift_index, assign_type, row
+
+
+def write_pivot_csv(out_path: str, total_weeks: int, shift_patterns: Dict[str, List[WeekPlan]], cfg: Config) -> None:
+    """
+    Writes a pivot-style CSV matching the spreadsheet-like view:
+    - Weeks laid out horizontally with day columns (M..Su) per week.
+    - One row per shift+type, labeled with times and timezone.
+    - Cells contain the semicolon-separated member list for that day.
+
+    Note: CSV cannot merge cells for week headers; we emit a header row per week.
+    """
+    # Build header: for each week, 7 day columns plus Hours and Total
+    week_headers, day_headers = _pivot_headers(total_weeks)
 
     # Write CSV
-    with open(out_path, "w", newline="", encoding="utf-8") as f:
+    with open(out_path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
         writer = csv.writer(f)
         # First column label for shift row names
         writer.writerow(["Shift"] + week_headers)
-        writer.writerow([""] + day_headers * total_weeks)
-        for r in rows:
-            writer.writerow(r)
+        writer.writerow([""] + day_headers + ["Avg"])
+        writer.writerows(row for _, _, row in _pivot_rows(total_weeks, shift_patterns, cfg))
 
 
 def write_pivot_xlsx(out_path: str, total_weeks: int, shift_patterns: Dict[str, List[WeekPlan]], cfg: Config) -> None:
@@ -694,94 +826,27 @@ def write_pivot_xlsx(out_path: str, total_weeks: int, shift_patterns: Dict[str,
     """
     try:
         from openpyxl import Workbook
-        from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
-        from openpyxl.utils import get_column_letter
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import PatternFill, Font, Alignment, Border, Side, NamedStyle
+        from openpyxl.styles.borders import DEFAULT_BORDER
+        from openpyxl.styles.fonts import DEFAULT_FONT
+        from openpyxl.worksheet.dimensions import ColumnDimension
     except Exception as e:
         raise RuntimeError("XLSX output requires 'openpyxl'. Please install it.") from e
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Schedule"
+    # Write-only mode streams rows to disk instead of keeping every Cell in memory.
+    # Rows must be appended top to bottom; column widths and frozen panes have to
+    # be set before the first row is written.
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Schedule")
 
     # Header rows
-    week_headers: List[str] = []
-    day_headers: List[str] = []
-    for w in range(total_weeks):
-        week_headers.extend([f"Week {w+1}"] + ["" for _ in range(8)])
-        day_headers.extend(["M", "T", "W", "Th", "F", "S", "Su", "Hours", "Total"])
+    week_headers, day_headers = _pivot_headers(total_weeks)
 
     # Add final Avg column
     week_headers.append("")
     day_headers.append("Avg")
 
-    # Write headers
-    ws.cell(row=1, column=1, value="Shift")
-    for i, h in enumerate(week_headers, start=2):
-        ws.cell(row=1, column=i, value=h)
-    for i, h in enumerate(day_headers * total_weeks, start=2):
-        ws.cell(row=2, column=i, value=h)
-
-    # Build data rows like CSV pivot (one row per person per assign type)
-    rows: List[Tuple[str, List[str]]] = []
-    for shift in cfg.shifts:
-        patterns = shift_patterns[shift.name]
-        def _country_code(name: str) -> str:
-            first = name.split()[0].lower()
-            return {
-                "lithuania": "LT",
-                "indonesia": "ID",
-            }.get(first, first[:2].upper())
-
-        def _short_time(t: str) -> str:
-            return t.split(":")[0]
-
-        def base_label(assign_type: str) -> str:
-            code = _country_code(shift.name)
-            shift_num = "S1" if assign_type == DAY else "S2"
-            time_range = f"{_short_time(shift.day_shift.start)}-{_short_time(shift.day_shift.end)}" if assign_type == DAY else f"{_short_time(shift.night_shift.start)}-{_short_time(shift.night_shift.end)}"
-            return f"{code} {shift_num}: {time_range}"
-        def _hours_for(assign_type: str) -> float:
-            def parse_hhmm(s: str):
-                h, m = s.split(":"); return int(h), int(m)
-            sh = shift.day_shift if assign_type == DAY else shift.night_shift
-            h1, m1 = parse_hhmm(sh.start)
-            h2, m2 = parse_hhmm(sh.end)
-            t1 = dt.timedelta(hours=h1, minutes=m1)
-            t2 = dt.timedelta(hours=h2, minutes=m2)
-            dur = t2 - t1
-            if dur.total_seconds() <= 0:
-                dur = (dt.timedelta(days=1) - t1) + t2
-            return dur.total_seconds() / 3600.0
-        for assign_type in (DAY, NIGHT):
-            for person in shift.people:
-                cells: List[str] = []
-                for w in range(total_weeks):
-                    week = patterns[w % len(patterns)]
-                    worked_days = 0
-                    for d in range(7):
-                        members = week.days[d].assignments[assign_type]
-                        val = person if person in members else ""
-                        cells.append(val)
-                        if person in members:
-                            worked_days += 1
-                    # weekly hours after each week block
-                    hours = worked_days * _hours_for(assign_type)
-                    cells.append(f"{hours:.1f}")
-                    # combined total only on DAY rows; NIGHT rows blank
-                    if assign_type == DAY:
-                        combined = 0.0
-                        day_h = _hours_for(DAY)
-                        night_h = _hours_for(NIGHT)
-                        for d in range(7):
-                            if person in week.days[d].assignments[DAY]:
-                                combined += day_h
-                            if person in week.days[d].assignments[NIGHT]:
-                                combined += night_h
-                        cells.append(f"{combined:.1f}")
-                    else:
-                        cells.append("")
-                rows.append((base_label(assign_type), cells))
-
     # Styling
     header_fill = PatternFill("solid", fgColor="DDDDDD")
     bold = Font(bold=True)
@@ -789,14 +854,36 @@ def write_pivot_xlsx(out_path: str, total_weeks: int, shift_patterns: Dict[str,
     thin = Side(style="thin", color="BBBBBB")
     border = Border(left=thin, right=thin, top=thin, bottom=thin)
 
-    # Apply header style
-    for r in (1, 2):
-        for c in range(1, 1 + 1 + len(week_headers)):
-            cell = ws.cell(row=r, column=c)
-            cell.fill = header_fill
-            cell.font = bold
-            cell.alignment = center
-            cell.border = border
+    # Freeze top two rows
+    ws.freeze_panes = "A3"
+
+    # Set column widths roughly
+    ws.column_dimensions["A"].width = 40
+    # Data columns (B..): narrow but readable. One <col min.. max..> span covers
+    # them all instead of a dimension entry per column.
+    ws.column_dimensions["B"] = ColumnDimension(ws, index="B", min=2, max=1 + len(week_headers), width=10)
+
+    # Each distinct fill/font/alignment/border combination is registered once as a
+    # named style, so a cell takes a single style assignment instead of four.
+    def _style(name: str, fill, font=DEFAULT_FONT, alignment=None, border=DEFAULT_BORDER,
+               number_format="General") -> str:
+        if name not in wb.named_styles:
+            wb.add_named_style(NamedStyle(
+                name=name, fill=fill, font=font,
+                alignment=alignment or Alignment(), border=border,
+                number_format=number_format,
+            ))
+        return name
+
+    def _cell(value, style: str):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    # Header rows
+    header_style = _style("Pivot Header", header_fill, font=bold, alignment=center, border=border)
+    for values in (["Shift"] + week_headers, [None] + day_headers):
+        ws.append([_cell(v, header_style) for v in values])
 
     # Color map per team/type
     def team_colors(idx: int):
@@ -810,106 +897,24 @@ def write_pivot_xlsx(out_path: str, total_weeks: int, shift_patterns: Dict[str,
         return palettes[idx % len(palettes)]
 
     # Write data rows with coloring per team/type
-    row_idx = 3
-    for shift_index, shift in enumerate(cfg.shifts):
-        patterns = shift_patterns[shift.name]
-        
-        def _country_code(name: str) -> str:
-            first = name.split()[0].lower()
-            return {
-                "lithuania": "LT",
-                "indonesia": "ID",
-            }.get(first, first[:2].upper())
-
-        def _short_time(t: str) -> str:
-            return t.split(":")[0]
-
-        day_color, night_color = team_colors(shift_index)
-        # For each type, for each person
-        for assign_type in (DAY, NIGHT):
-            code = _country_code(shift.name)
-            shift_num = "S1" if assign_type == DAY else "S2"
-            time_range = f"{_short_time(shift.day_shift.start)}-{_short_time(shift.day_shift.end)}" if assign_type == DAY else f"{_short_time(shift.night_shift.start)}-{_short_time(shift.night_shift.end)}"
-            label = f"{code} {shift_num}: {time_range}"
-            
+    row_styles: Dict[Tuple[int, int], Tuple[str, str, str]] = {}
+    # Hours are written as numbers shown to one decimal, so they stay summable
+    # and sortable in Excel
+    for shift_index, assign_type, row in _pivot_rows(total_weeks, shift_patterns, cfg, hours_cell=float):
+        styles = row_styles.get((shift_index, assign_type))
+        if styles is None:
+            day_color, night_color = team_colors(shift_index)
             color = day_color if assign_type == DAY else night_color
             fill = PatternFill("solid", fgColor=color)
-            for person in shift.people:
-                a_cell = ws.cell(row=row_idx, column=1, value=label)
-                a_cell.font = Font(bold=True)
-                # fill cells including weekly hours and combined totals
-                col = 2
-                total_hours_across_weeks = 0.0
-                for w in range(total_weeks):
-                    week = shift_patterns[shift.name][w % len(shift_patterns[shift.name])]
-                    worked_days = 0
-                    for d in range(7):
-                        members = week.days[d].assignments[assign_type]
-                        val = person if person in members else ""
-                        cell = ws.cell(row=row_idx, column=col, value=val)
-                        cell.border = border
-                        cell.alignment = center
-                        if person in members:
-                            worked_days += 1
-                        col += 1
-                    # Add weekly hours cell after each week block
-                    hours = worked_days * _hours_for(assign_type)
-                    total_hours_across_weeks += hours
-                    hcell = ws.cell(row=row_idx, column=col, value=f"{hours:.1f}")
-                    hcell.border = border
-                    hcell.alignment = center
-                    col += 1
-                    # Add combined TOTAL (DAY+NIGHT) after Hours - only for DAY rows
-                    if assign_type == DAY:
-                        combined = 0.0
-                        # compute shift hours
-                        day_h = _hours_for(DAY)
-                        night_h = _hours_for(NIGHT)
-                        for d in range(7):
-                            if person in week.days[d].assignments[DAY]:
-                                combined += day_h
-                            if person in week.days[d].assignments[NIGHT]:
-                                combined += night_h
-                        tcell = ws.cell(row=row_idx, column=col, value=f"{combined:.1f}")
-                    else:
-                        tcell = ws.cell(row=row_idx, column=col, value="")
-                    tcell.border = border
-                    tcell.alignment = center
-                    col += 1
-                # Add average combined hours (DAY+NIGHT) per week - only for DAY rows
-                if assign_type == DAY:
-                    total_combined_hours = 0.0
-                    day_h = _hours_for(DAY)
-                    night_h = _hours_for(NIGHT)
-                    for w in range(total_weeks):
-                        week = shift_patterns[shift.name][w % len(shift_patterns[shift.name])]
-                        week_combined = 0.0
-                        for d in range(7):
-                            if person in week.days[d].assignments[DAY]:
-                                week_combined += day_h
-                            if person in week.days[d].assignments[NIGHT]:
-                                week_combined += night_h
-                        total_combined_hours += week_combined
-                    avg_hours = total_combined_hours / total_weeks if total_weeks > 0 else 0.0
-                    avg_cell = ws.cell(row=row_idx, column=col, value=f"{avg_hours:.1f}")
-                else:
-                    avg_cell = ws.cell(row=row_idx, column=col, value="")
-                avg_cell.border = border
-                avg_cell.alignment = center
-                avg_cell.font = Font(bold=True)
-                # color full row
-                for c in range(1, 1 + 1 + len(week_headers)):
-                    ws.cell(row=row_idx, column=c).fill = fill
-                row_idx += 1
-
-    # Freeze top two rows
-    ws.freeze_panes = ws["A3"]
-
-    # Set column widths roughly
-    ws.column_dimensions["A"].width = 40
-    # Data columns (B..): narrow but readable
-    for c in range(2, 2 + len(week_headers)):
-        col_letter = get_column_letter(c)
-        ws.column_dimensions[col_letter].width = 10
+            styles = row_styles[(shift_index, assign_type)] = (
+                _style(f"Pivot {color} Label", fill, font=bold),
+                _style(f"Pivot {color}", fill, alignment=center, border=border, number_format="0.0"),
+                _style(f"Pivot {color} Avg", fill, font=bold, alignment=center, border=border, number_format="0.0"),
+            )
+        label_style, data_style, avg_style = styles
+        row_cells = [_cell(row[0], label_style)]
+        row_cells.extend([_cell(val, data_style) for val in row[1:-1]])
+        row_cells.append(_cell(row[-1], avg_style))
+        ws.append(row_cells)
 
     wb.save(out_path)
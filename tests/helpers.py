@@ -0,0 +1,35 @@
+"""Factories shared by the test modules."""
+import contextlib
+import io
+
+from src.models import RulesConfig, ShiftConfig, TimeRange
+
+
+def make_shift(people, **staffing) -> ShiftConfig:
+    # 6h shifts keep a full week of work under the default 48h cap
+    return ShiftConfig(
+        name=staffing.pop("name", "Test"),
+        people=list(people),
+        timezone="UTC",
+        day_shift=TimeRange("08:00", "14:00"),
+        night_shift=TimeRange("14:00", "20:00"),
+        **staffing,
+    )
+
+
+def make_rules(**overrides) -> RulesConfig:
+    values = dict(
+        max_shifts_in_row=7,
+        max_days_off=2,
+        min_days_off=1,
+        no_day_after_night=True,
+        friday_shift2_priority_names=[],
+        min_days_off_after_night_streak=0,
+    )
+    values.update(overrides)
+    return RulesConfig(**values)
+
+
+def quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
@@ -0,0 +1,181 @@
+import contextlib
+import io
+import json
+import os
+import re
+import tempfile
+import unittest
+
+from src import main as cli
+from src.config import parse_config
+from src.scheduling import _pattern_meets_mins, allocate_week_pattern, find_smallest_valid_pattern
+
+
+def team(name, people, **extra):
+    shift = {
+        "name": name,
+        "people": people,
+        "timezone": "UTC",
+        "day_shift": {"start": "09:00", "end": "18:00"},
+        "night_shift": {"start": "17:00", "end": "02:00"},
+        "min_day_staff": 1,
+        "max_day_staff": 3,
+        "min_night_staff": 1,
+        "max_night_staff": 2,
+    }
+    shift.update(extra)
+    return shift
+
+
+# Two teams whose searches both print understaffing WARNING blocks
+TWO_TEAMS = {
+    "shifts": [
+        team("Lithuania Team", ["Alice", "Bob", "Charlie", "Dan", "Eve", "Fay"],
+             min_day_staff_wednesday=2, max_day_staff_wednesday=3),
+        team("Shift 2", ["Dina", "Evan", "Frank", "Gus", "Hal", "Ivy", "Jo"],
+             min_day_staff_weekend=1, max_day_staff_weekend=2),
+    ],
+    "rules": {
+        "max_shifts_in_row": 5,
+        "max_days_off": 2,
+        "min_days_off": 1,
+        "friday_shift2_priority_names": ["Dina"],
+        "min_days_off_after_night_streak": 1,
+        "target_weekly_hours_min": 35,
+        "target_weekly_hours_max": 45,
+    },
+}
+
+
+class CliTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write_config(self, raw) -> str:
+        path = os.path.join(self.tmp.name, "config.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(raw, f)
+        return path
+
+    def run_cli(self, config_path, *extra, rc=0) -> str:
+        out = io.StringIO()
+        argv = ["--config", config_path, "--start", "2025-01",
+                "--out", os.path.join(self.tmp.name, "schedule"), "--format", "csv", *extra]
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(cli.main(argv), rc)
+        return out.getvalue()
+
+
+class ParallelSearchOutputTest(CliTestCase):
+    def test_output_matches_a_serial_run(self):
+        path = self.write_config(TWO_TEAMS)
+        cfg = parse_config(path)
+        expected = io.StringIO()
+        with contextlib.redirect_stdout(expected):
+            for s in cfg.shifts:
+                patterns = find_smallest_valid_pattern(s, cfg.rules, 10)
+                print(f"Shift '{s.name}': repeating every {len(patterns)} weeks with {len(s.people)} members")
+        self.assertIn("WARNING", expected.getvalue())
+        self.assertTrue(self.run_cli(path).startswith(expected.getvalue()))
+
+    def test_failed_search_reports_earlier_shifts_first(self):
+        raw = json.loads(json.dumps(TWO_TEAMS))
+        # Four people cannot cover two DAY and two NIGHT slots within the OFF bounds
+        raw["shifts"].insert(1, team("Tiny", ["Wes", "Xan", "Yul", "Zed"], min_day_staff=2, max_day_staff=2,
+                                     min_night_staff=2, max_night_staff=2))
+        path = self.write_config(raw)
+        cfg = parse_config(path)
+        expected = io.StringIO()
+        with contextlib.redirect_stdout(expected):
+            first = cfg.shifts[0]
+            patterns = find_smallest_valid_pattern(first, cfg.rules, 10)
+            print(f"Shift '{first.name}': repeating every {len(patterns)} weeks with {len(first.people)} members")
+            with self.assertRaises(ValueError) as serial:
+                find_smallest_valid_pattern(cfg.shifts[1], cfg.rules, 10)
+        out = io.StringIO()
+        argv = ["--config", path, "--start", "2025-01", "--out", os.path.join(self.tmp.name, "schedule"), "--format", "csv"]
+        with contextlib.redirect_stdout(out), self.assertRaises(ValueError) as parallel:
+            cli.main(argv)
+        self.assertEqual(str(parallel.exception), str(serial.exception))
+        self.assertEqual(out.getvalue(), expected.getvalue())
+
+
+class OutputPathTest(CliTestCase):
+    def test_out_keeps_the_path_as_typed(self):
+        path = self.write_config(TWO_TEAMS)
+        cases = {
+            "schedule": "schedule.csv",
+            "schedule.XLSX": "schedule.csv",
+            "schedule.v2": "schedule.v2.csv",
+            "./schedule": "./schedule.csv",
+            ".": "..csv",
+            "": ".csv",
+        }
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        for out, written in cases.items():
+            with self.subTest(out=out):
+                printed = io.StringIO()
+                with contextlib.redirect_stdout(printed):
+                    self.assertEqual(cli.main(["--config", path, "--start", "2025-01", "--out", out, "--format", "csv"]), 0)
+                self.assertTrue(printed.getvalue().endswith(f"Schedule written to {written}\n"))
+                self.assertTrue(os.path.isfile(written))
+
+
+def full_trial(cfg, weeks):
+    """Allocate every shift in config order; (min, max) avg hours, or None if a shift fails."""
+    hours = dict.fromkeys((p for s in cfg.shifts for p in s.people), 0.0)
+    weekends = dict.fromkeys(hours, 0)
+    for s in cfg.shifts:
+        try:
+            patterns = allocate_week_pattern(s, cfg.rules, weeks, hours, weekends)
+        except ValueError:
+            return None
+        if not _pattern_meets_mins(patterns, s):
+            return None
+    return min(hours.values()) / weeks, max(hours.values()) / weeks
+
+
+class EqualHoursFailureTest(CliTestCase):
+    def test_shift_without_a_pattern_is_reported(self):
+        raw = json.loads(json.dumps(TWO_TEAMS))
+        raw["rules"]["require_equal_hours"] = True
+        path = self.write_config(raw)
+        out = os.path.join(self.tmp.name, "schedule")
+        errors = io.StringIO()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(errors):
+            rc = cli.main(["--config", path, "--start", "2025-01", "--out", out, "--format", "csv", "--max-weeks", "4"])
+        # Lithuania Team fails the last trial, so there is nothing to write
+        self.assertEqual(rc, 1)
+        self.assertEqual(errors.getvalue(), "Error: No valid pattern found for shift(s): Lithuania Team\n")
+        self.assertFalse(os.path.exists(f"{out}.csv"))
+
+
+class EqualHoursEarlyExitTest(CliTestCase):
+    def test_early_exits_match_full_trials(self):
+        raw = json.loads(json.dumps(TWO_TEAMS))
+        raw["rules"]["require_equal_hours"] = True
+        path = self.write_config(raw)
+        cfg = parse_config(path)
+        # Lithuania Team never meets the equal-hours bounds here, so the run
+        # ends on the last trial's patterns and reports the failed shift
+        output = self.run_cli(path, "--max-weeks", "6", rc=1)
+        stopped = 0
+        for weeks, message in re.findall(r"^Pattern (\d+) weeks: (.*)$", output, re.M):
+            with contextlib.redirect_stdout(io.StringIO()):
+                spread = full_trial(cfg, int(weeks))
+            if "stopping early" in message:
+                # Stopping on a subset must never skip a trial that could pass
+                stopped += 1
+                self.assertIn("allocated so far", message)
+                self.assertTrue(spread is None or spread[1] - spread[0] > 0.5, weeks)
+            else:
+                self.assertIsNotNone(spread, weeks)
+                self.assertEqual(message, f"hours not equal (min={spread[0]:.1f}, max={spread[1]:.1f}), trying longer...")
+        self.assertGreater(stopped, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
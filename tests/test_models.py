@@ -0,0 +1,67 @@
+import random
+import unittest
+
+from src.models import DAY, NIGHT, OFF, DayPlan, PersonState
+from tests.helpers import make_rules
+
+
+def allowed(state: PersonState, assign: int, rules) -> bool:
+    """The per-call rule checks the cached mask stands in for."""
+    if state.night_cooldown_remaining > 0 and assign != OFF:
+        return False
+    if assign in (DAY, NIGHT):
+        if state.working_streak_len >= rules.max_shifts_in_row:
+            return False
+        if state.streak_type == OFF and state.streak_len < rules.min_days_off:
+            return False
+    if assign == OFF and state.streak_type == OFF and state.streak_len >= rules.max_days_off:
+        return False
+    if assign == DAY and rules.no_day_after_night and state.last_assignment == NIGHT:
+        return False
+    return True
+
+
+class LegalMaskTest(unittest.TestCase):
+    def test_cached_mask_matches_rule_checks(self):
+        rng = random.Random(3)
+        for _ in range(200):
+            rules = [
+                make_rules(
+                    max_shifts_in_row=rng.randint(1, 6),
+                    min_days_off=rng.randint(0, 2),
+                    max_days_off=rng.randint(2, 4),
+                    no_day_after_night=rng.random() < 0.5,
+                    min_days_off_after_night_streak=rng.randint(0, 2),
+                )
+                for _ in range(2)
+            ]
+            state = PersonState(name="P")
+            for _ in range(40):
+                # Switching rules, or applying without any, must not leave a stale mask
+                r = rng.choice(rules)
+                for assign in (DAY, NIGHT, OFF):
+                    self.assertEqual(state.can_assign(assign, r), allowed(state, assign, r), state)
+                state.apply(rng.choice((DAY, NIGHT, OFF)), rng.choice(rules + [None]))
+
+    def test_cache_does_not_affect_equality_or_repr(self):
+        fresh = PersonState(name="P")
+        used = PersonState(name="P")
+        used.can_assign(DAY, make_rules())
+        self.assertNotEqual(used.mask_rules, fresh.mask_rules)
+        self.assertEqual(used, fresh)
+        self.assertEqual(repr(used), repr(fresh))
+        self.assertNotIn("mask", repr(used))
+        with self.assertRaises(TypeError):
+            PersonState(name="P", legal_mask=1)
+
+
+class DayPlanTest(unittest.TestCase):
+    def test_assignments_by_label_shares_the_lists(self):
+        plan = DayPlan(weekday_index=0, assignments=[["A"], ["B", "C"], []])
+        by_label = plan.assignments_by_label()
+        self.assertEqual(by_label, {"DAY": ["A"], "NIGHT": ["B", "C"], "OFF": []})
+        self.assertIs(by_label["NIGHT"], plan.assignments[NIGHT])
+
+
+if __name__ == "__main__":
+    unittest.main()
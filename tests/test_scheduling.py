@@ -0,0 +1,132 @@
+import contextlib
+import dataclasses
+import io
+import random
+import unittest
+
+from src import scheduling
+from tests.helpers import make_rules, make_shift, quiet
+
+
+def random_case(rng: random.Random):
+    """A small random shift/rules pair, within what validate_config allows."""
+    n = rng.randint(1, 5)
+    min_day = rng.randint(0, n)
+    min_night = rng.randint(0, n)
+    overrides = {
+        f"{bound}_{kind}_staff_{day}": rng.choice([None, 0, 1, 2, 3])
+        for bound in ("min", "max") for kind in ("day", "night") for day in ("weekend", "wednesday")
+    }
+    shift = make_shift(
+        [f"P{i}" for i in range(n)],
+        min_day_staff=min_day, max_day_staff=rng.randint(min_day, n),
+        min_night_staff=min_night, max_night_staff=rng.randint(min_night, n),
+        **overrides,
+    )
+    min_off = rng.randint(0, 3)
+    rules = make_rules(
+        max_shifts_in_row=rng.randint(1, 8),
+        min_days_off=min_off,
+        max_days_off=rng.randint(min_off, 4),
+        no_day_after_night=rng.random() < 0.5,
+        min_days_off_after_night_streak=rng.randint(0, 2),
+    )
+    return shift, rules
+
+
+class WeeklyOffPruneTest(unittest.TestCase):
+    def test_min_staff_above_override_targets_is_not_pruned(self):
+        # Weekend/Wednesday targets allow no nights, but the backfill still
+        # staffs the regular min_night_staff=2 on those days.
+        shift = make_shift(
+            ["A", "B", "C"],
+            min_day_staff=0, max_day_staff=1, min_night_staff=2, max_night_staff=2,
+            min_night_staff_weekend=0, max_night_staff_weekend=0,
+            min_night_staff_wednesday=0, max_night_staff_wednesday=0,
+        )
+        rules = make_rules(max_days_off=0, min_days_off=0)
+        self.assertFalse(scheduling._weekly_off_infeasible(shift, rules))
+        pattern = quiet(scheduling.find_smallest_valid_pattern, shift, rules, 10)
+        self.assertEqual(len(pattern), 2)
+
+    def test_pruned_shifts_have_no_valid_allocation(self):
+        # Exhaustive check over small lengths: anything the prune rejects must
+        # fail the weekly OFF bounds for every pattern length.
+        rng = random.Random(7)
+        flagged = 0
+        for _ in range(3000):
+            shift, rules = random_case(rng)
+            if not scheduling._weekly_off_infeasible(shift, rules):
+                continue
+            flagged += 1
+            for weeks in range(1, 7):
+                with self.assertRaises(ValueError, msg=f"{shift} {rules} weeks={weeks}"):
+                    quiet(scheduling.allocate_week_pattern, shift, rules, weeks)
+        self.assertGreater(flagged, 0)
+
+    def test_prune_does_not_change_search_results(self):
+        rng = random.Random(1)
+        real_check = scheduling._weekly_off_infeasible
+        for _ in range(300):
+            shift, rules = random_case(rng)
+            if not real_check(shift, rules):
+                continue
+            pruned = _outcome(shift, rules)
+            scheduling._weekly_off_infeasible = lambda *_: False
+            try:
+                exhaustive = _outcome(shift, rules)
+            finally:
+                scheduling._weekly_off_infeasible = real_check
+            self.assertEqual(pruned, exhaustive, f"{shift} {rules}")
+
+
+class AdjustmentPassTest(unittest.TestCase):
+    def test_adjusted_rules_drop_the_hours_cap(self):
+        # Covering one DAY and one NIGHT a day takes 28h/week each from three
+        # people, so the 20h cap fails every sweep with the configured rules.
+        # The adjustment pass goes back to the default 48h cap and succeeds.
+        shift = make_shift(["A", "B", "C"], min_day_staff=1, max_day_staff=1, min_night_staff=1, max_night_staff=1)
+        rules = make_rules(target_weekly_hours_min=20, target_weekly_hours_max=20)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            pattern = scheduling.find_smallest_valid_pattern(shift, rules, 6)
+        self.assertIn("Adjusted rules for 'Test': max_days_off=2", out.getvalue())
+        self.assertTrue(scheduling._pattern_meets_mins(pattern, shift))
+        averages = scheduling._compute_avg_week_hours(pattern, shift)
+        self.assertGreater(max(averages.values()), rules.target_weekly_hours_max)
+
+    def test_adjusted_rules_reset_only_the_documented_fields(self):
+        shift = make_shift(["A", "B", "C", "D"], min_day_staff=2, max_day_staff=2, min_night_staff=2, max_night_staff=2)
+        rules = make_rules(target_weekly_hours_max=30, require_equal_hours=True, friday_shift2_priority_names=["A"])
+        seen = []
+        real_allocate = scheduling.allocate_week_pattern
+
+        def recording(shift, rules, weeks, *rest):
+            seen.append(rules)
+            return real_allocate(shift, rules, weeks, *rest)
+
+        scheduling.allocate_week_pattern = recording
+        try:
+            # Whether the last resort succeeds doesn't matter, only what it was given
+            with contextlib.suppress(ValueError):
+                quiet(scheduling.find_smallest_valid_pattern, shift, rules, 4)
+        finally:
+            scheduling.allocate_week_pattern = real_allocate
+        adjusted = [r for r in seen if r is not rules]
+        self.assertTrue(adjusted)
+        for r in adjusted:
+            self.assertEqual(r, dataclasses.replace(
+                rules, friday_shift2_priority_names=[], target_weekly_hours_max=48,
+                require_equal_hours=False, max_days_off=r.max_days_off))
+
+
+def _outcome(shift, rules, max_weeks=6):
+    try:
+        pattern = quiet(scheduling.find_smallest_valid_pattern, shift, rules, max_weeks)
+    except ValueError:
+        return "ValueError"
+    return [[day.assignments for day in week.days] for week in pattern]
+
+
+if __name__ == "__main__":
+    unittest.main()